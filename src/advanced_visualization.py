@@ -8,8 +8,10 @@ from datetime import datetime, timedelta
 import requests
 import json
 import polars as pl
-from pyiceberg.catalog.sql import SqlCatalog
+from catalog import get_table
+import spool
 import numpy as np
+from train_model import latest_model_path, load_latest_model, predict_next_day
 
 # ページ設定
 st.set_page_config(
@@ -18,10 +20,23 @@ st.set_page_config(
     layout="wide"
 )
 
+# 取得したデータはバックグラウンドでまとめて weather.forecast にコミットする
+@st.cache_resource
+def start_spool_committer():
+    return spool.start_background_committer()
+
+start_spool_committer()
+
 # タイトル
 st.title("📊 高度な天気データ分析ダッシュボード")
 st.markdown("---")
 
+# 学習済みモデルを再実行間で使い回す（学習は train_model.py で行う）
+@st.cache_resource
+def get_forecast_model(latest_path):
+    # latest_path はキャッシュのキー。読み込み時に消えていればその次に新しいモデルを使う
+    return load_latest_model()
+
 # サイドバー設定
 st.sidebar.header("📋 分析設定")
 
@@ -57,13 +72,7 @@ if st.sidebar.button("🔄 データを更新"):
 if selected_cities:
     # データベースからデータを読み込み
     try:
-        catalog = SqlCatalog(
-            "default",
-            uri="sqlite:///data/pyiceberg_catalog.db",
-            warehouse="file://data"
-        )
-        
-        table = catalog.load_table("weather.forecast")
+        table = get_table()
         df = pl.scan_iceberg(table).collect()
         
         if not df.is_empty():
@@ -219,6 +228,17 @@ if selected_cities:
                         )
                         st.plotly_chart(fig_bar2, use_container_width=True)
                     
+                    # 翌日の天気予測
+                    st.subheader("🤖 翌日の天気予測")
+                    
+                    model_path = latest_model_path()
+                    model = get_forecast_model(model_path) if model_path is not None else None
+                    if model is not None:
+                        predictions = predict_next_day(model, pl.from_pandas(filtered_df))
+                        st.dataframe(predictions.to_pandas(), use_container_width=True)
+                    else:
+                        st.info("学習済みモデルがありません。`python src/train_model.py` でモデルを学習してください。")
+                    
                     # 相関分析
                     st.subheader("🔍 相関分析")
                     
@@ -0,0 +1,31 @@
+import pyarrow as pa
+from pyiceberg.catalog.sql import SqlCatalog
+
+WAREHOUSE_PATH = "data"
+TABLE_NAME = "weather.forecast"
+
+# fetch_weather.py が書き込むのと同じ列構成
+FORECAST_SCHEMA = pa.schema([
+    ("city", pa.large_string()),
+    ("date", pa.large_string()),
+    ("today", pa.large_string()),
+    ("tomorrow", pa.large_string()),
+])
+
+
+def get_catalog() -> SqlCatalog:
+    # 既存のテーブルはこのカタログ名で登録されているため名前を変えないこと
+    return SqlCatalog(
+        "dafault",
+        uri=f"sqlite:///{WAREHOUSE_PATH}/pyiceberg_catalog.db",
+        warehouse=f"file://{WAREHOUSE_PATH}"
+    )
+
+
+def get_table(create: bool = False):
+    """weather.forecast テーブルを返す（create=True なら無ければ作成する）"""
+    catalog = get_catalog()
+    if not create:
+        return catalog.load_table(TABLE_NAME)
+    catalog.create_namespace_if_not_exists("weather")
+    return catalog.create_table_if_not_exists(TABLE_NAME, schema=FORECAST_SCHEMA)
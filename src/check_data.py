@@ -1,18 +1,9 @@
 import polars as pl
-from pyiceberg.catalog.sql import SqlCatalog
-
-WAREHOUSE_PATH = "data"
-
-# SqlCatalogを使ってカタログを作成
-catalog = SqlCatalog(
-    "dafault",
-    uri=f"sqlite:///{WAREHOUSE_PATH}/pyiceberg_catalog.db",
-    warehouse=f"file://{WAREHOUSE_PATH}"
-)
+from catalog import get_table
 
 # weather.forecastテーブルを読み込む
 try:
-    table = catalog.load_table("weather.forecast")
+    table = get_table()
     print("テーブル 'weather.forecast' の読み込みに成功しました。")
     df = pl.scan_iceberg(table).collect()
     print(df)
@@ -1,12 +1,9 @@
 from datetime import datetime
-import traceback
 import requests
 import json
 import polars as pl
-from pyiceberg.catalog.sql import SqlCatalog
-from pyiceberg.exceptions import NamespaceAlreadyExistsError, TableAlreadyExistsError
+import spool
 
-WAREHOUSE_PATH = "data"
 BASE_URL = "https://weather.tsukumijima.net/api/forecast"
 
 def fetch_data(place: str):
@@ -29,39 +26,7 @@ def fetch_data(place: str):
     })
 
     print(df)
-    catalog = SqlCatalog(
-        "dafault",
-        uri=f"sqlite:///{WAREHOUSE_PATH}/pyiceberg_catalog.db",
-        warehouse=f"file://{WAREHOUSE_PATH}"
-    )
-
-    try:
-        catalog.create_namespace("weather")
-        print("Namespace 'weather' を作成しました。")
-
-    except NamespaceAlreadyExistsError:
-        print("Namespace 'weather' はすでに存在しています。")
-
-    except Exception:
-        error_msg = traceback.format_exc()
-        print("Namespace 'weather' は既に存在するか、作成に失敗しました。エラー内容:", error_msg)
-
-
-    try:
-        tgt_table = catalog.create_table(
-            "weather.forecast",
-            schema=df.to_arrow().schema
-        )
-        print("テーブル 'weather.forecast' を作成しました。")
-    
-    except TableAlreadyExistsError:
-        print("テーブル 'weather.forecast' はすでに存在しています。")
-        tgt_table = catalog.load_table("weather.forecast")
-
-    except Exception:
-        error_msg = traceback.format_exc()
-        print("テーブル 'weather.forecast' の作成に失敗しました。エラー内容:", error_msg)
-
-
-    df.write_iceberg(tgt_table, mode='append')
-    print("fetch data completed!")
\ No newline at end of file
+    # コミットの成否に関わらずデータを失わないよう、まずスプールに書き込む
+    # （weather.forecast への反映は spool.drain() で行う）
+    spool.append(df.to_dicts())
+    print("fetch data completed!")
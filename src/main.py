@@ -1,4 +1,5 @@
 from fetch_weather import fetch_data
 
 if __name__ == "__main__":
+    # 取得データはスプールに書き込まれ、spool.py がまとめてコミットする
     fetch_data("tokyo")
\ No newline at end of file
@@ -0,0 +1,260 @@
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+import pyarrow as pa
+from catalog import FORECAST_SCHEMA, WAREHOUSE_PATH, get_table
+
+SPOOL_DIR = f"{WAREHOUSE_PATH}/spool"
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+CHECKPOINT_FILE = "checkpoint.json"
+SPOOL_ID_FILE = "spool_id"
+LOCK_FILE = ".lock"
+APPEND_LOCK_FILE = ".append.lock"
+
+# コミット済み位置を Iceberg スナップショットのサマリーにも記録するためのキー
+SPOOL_ID_PROPERTY = "spool.id"
+SEGMENT_PROPERTY = "spool.segment"
+OFFSET_PROPERTY = "spool.offset"
+
+
+def _segment_path(seq: int) -> str:
+    return os.path.join(SPOOL_DIR, f"segment-{seq:08d}.jsonl")
+
+
+def _list_segments() -> list[int]:
+    if not os.path.isdir(SPOOL_DIR):
+        return []
+    return sorted(
+        int(name[len("segment-"):-len(".jsonl")])
+        for name in os.listdir(SPOOL_DIR)
+        if name.startswith("segment-") and name.endswith(".jsonl")
+    )
+
+
+def _fsync_dir():
+    fd = os.open(SPOOL_DIR, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def _locked(name: str):
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    with open(os.path.join(SPOOL_DIR, name), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _spool_id() -> str:
+    """スプールディレクトリ固有の ID を返す（無ければ作成する）
+
+    ディレクトリが作り直された場合に、テーブルに記録された古い
+    スプールの位置を今のセグメントに当てはめないために使う。
+    APPEND_LOCK_FILE のロック中に呼ぶこと。
+    """
+    path = os.path.join(SPOOL_DIR, SPOOL_ID_FILE)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(uuid.uuid4().hex)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir()
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+def append(records: list[dict]):
+    """レコードをスプールの末尾に追記し、まとめて1回 fsync する
+
+    セグメントの切り替え判定と書き込みはロック中に行うため、
+    他のプロセスが書き込み中の行を途中で切れた行と誤認しない。
+    """
+    if not records:
+        return
+    data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    with _locked(APPEND_LOCK_FILE):
+        _spool_id()
+        segments = _list_segments()
+        seq = segments[-1] if segments else 0
+        path = _segment_path(seq)
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            # 書き込み途中でクラッシュした行の後ろには追記しない
+            torn = False
+            if size > 0:
+                with open(path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+            if size >= SEGMENT_MAX_BYTES or torn:
+                seq += 1
+                path = _segment_path(seq)
+
+        created = not os.path.exists(path)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # os.write は一部だけ書き込んで返ることがあるため、全て書き終えるまで繰り返す
+            payload = memoryview(data.encode("utf-8"))
+            while payload:
+                payload = payload[os.write(fd, payload):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        if created:
+            _fsync_dir()
+
+
+def _read_checkpoint(spool_id: str) -> tuple[int, int]:
+    path = os.path.join(SPOOL_DIR, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return (0, 0)
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("spool_id", spool_id) != spool_id:
+        return (0, 0)
+    return (checkpoint["segment"], checkpoint["offset"])
+
+
+def _write_checkpoint(spool_id: str, position: tuple[int, int]):
+    path = os.path.join(SPOOL_DIR, CHECKPOINT_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"spool_id": spool_id, "segment": position[0], "offset": position[1]}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir()
+
+
+def _committed_position(table, spool_id: str) -> tuple[int, int]:
+    """テーブルに記録された、このスプールの最後のコミット位置を返す
+
+    コミット成功後、チェックポイント保存前にクラッシュした場合でも
+    同じレコードを二重に書き込まないために使う。
+    """
+    for snapshot in reversed(table.snapshots()):
+        summary = snapshot.summary
+        if summary is None or summary.get(SPOOL_ID_PROPERTY) != spool_id:
+            continue
+        segment = summary.get(SEGMENT_PROPERTY)
+        offset = summary.get(OFFSET_PROPERTY)
+        if segment is not None and offset is not None:
+            return (int(segment), int(offset))
+    return (0, 0)
+
+
+def _read_segment(seq: int, offset: int, limit: int) -> tuple[list[dict], int]:
+    """offset 行目から最大 limit 行を読み、レコードと読み終えた行番号を返す"""
+    records = []
+    line_no = 0
+    with open(_segment_path(seq), "rb") as f:
+        for line in f:
+            # 末尾の書き込み途中の行は次回に回す
+            if not line.endswith(b"\n"):
+                break
+            if line_no >= offset:
+                if len(records) >= limit:
+                    break
+                records.append(json.loads(line))
+            line_no += 1
+    return records, max(line_no, offset)
+
+
+def drain(batch_rows: int = 100_000) -> int:
+    """スプールの未コミット分を batch_rows 行ずつ Iceberg にコミットする
+
+    各コミットのスナップショットにスプール位置を記録するため、
+    失敗したコミットは次回の drain で再送され、成功分は再送されない。
+    戻り値はコミットした行数。
+    """
+    if not _list_segments():
+        return 0
+
+    with _locked(LOCK_FILE):
+        with _locked(APPEND_LOCK_FILE):
+            spool_id = _spool_id()
+
+        table = get_table(create=True)
+
+        position = max(_read_checkpoint(spool_id), _committed_position(table, spool_id))
+        total = 0
+        while True:
+            segments = [seq for seq in _list_segments() if seq >= position[0]]
+            records: list[dict] = []
+            for seq in segments:
+                offset = position[1] if seq == position[0] else 0
+                chunk, end = _read_segment(seq, offset, batch_rows - len(records))
+                records.extend(chunk)
+                position = (seq, end)
+                if len(records) >= batch_rows:
+                    break
+
+            if not records:
+                break
+
+            table.append(
+                pa.Table.from_pylist(records, schema=FORECAST_SCHEMA),
+                snapshot_properties={
+                    SPOOL_ID_PROPERTY: spool_id,
+                    SEGMENT_PROPERTY: str(position[0]),
+                    OFFSET_PROPERTY: str(position[1]),
+                },
+            )
+            _write_checkpoint(spool_id, position)
+            total += len(records)
+
+        _write_checkpoint(spool_id, position)
+
+        # コミット済みの古いセグメントを削除する（書き込み中の最新セグメントは残す）
+        with _locked(APPEND_LOCK_FILE):
+            segments = _list_segments()
+            for seq in segments[:-1]:
+                if seq < position[0]:
+                    os.remove(_segment_path(seq))
+
+    if total:
+        print(f"スプールから {total} 行をコミットしました。")
+    return total
+
+
+def watch(interval: float = 60.0, batch_rows: int = 100_000):
+    """interval 秒ごとに drain を繰り返す（失敗したコミットは次回再試行する）"""
+    while True:
+        try:
+            drain(batch_rows)
+        except Exception as e:
+            print("コミットに失敗しました。次回再試行します。エラー内容:", e)
+        time.sleep(interval)
+
+
+def start_background_committer(interval: float = 60.0, batch_rows: int = 100_000) -> threading.Thread:
+    """watch をデーモンスレッドで起動する"""
+    thread = threading.Thread(target=watch, args=(interval, batch_rows), daemon=True, name="spool-committer")
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スプールの内容を weather.forecast にコミットする")
+    parser.add_argument("--watch", action="store_true", help="常駐して定期的にコミットする")
+    parser.add_argument("--interval", type=float, default=60.0, help="--watch 時のコミット間隔（秒）")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="1回のコミットで書き込む行数")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.interval, args.batch_rows)
+    else:
+        drain(args.batch_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,9 @@ from datetime import datetime
 import requests
 import json
 from fetch_weather import fetch_data
+import spool
 import polars as pl
-from pyiceberg.catalog.sql import SqlCatalog
+from catalog import get_table
 
 # ページ設定
 st.set_page_config(
@@ -16,6 +17,13 @@ st.set_page_config(
     layout="wide"
 )
 
+# 取得したデータはバックグラウンドでまとめて weather.forecast にコミットする
+@st.cache_resource
+def start_spool_committer():
+    return spool.start_background_committer()
+
+start_spool_committer()
+
 # タイトル
 st.title("🌤️ 天気データ可視化アプリ")
 st.markdown("---")
@@ -37,7 +45,7 @@ if st.sidebar.button("データを取得"):
         try:
             if selected_city:
                 fetch_data(selected_city)
-                st.success("データの取得が完了しました！")
+                st.success("データの取得が完了しました！（テーブルへの反映には最大1分程度かかります）")
             else:
                 st.error("都市が選択されていません。")
         except Exception as e:
@@ -51,13 +59,7 @@ with col1:
     
     # データベースからデータを読み込み
     try:
-        catalog = SqlCatalog(
-            "default",
-            uri="sqlite:///data/pyiceberg_catalog.db",
-            warehouse="file://data"
-        )
-        
-        table = catalog.load_table("weather.forecast")
+        table = get_table()
         df = pl.scan_iceberg(table).collect()
         
         if not df.is_empty():
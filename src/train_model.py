@@ -0,0 +1,206 @@
+import contextlib
+import glob
+import os
+import pickle
+import tempfile
+import numpy as np
+import polars as pl
+from sklearn.ensemble import RandomForestClassifier
+from catalog import WAREHOUSE_PATH, get_table
+
+MODEL_DIR = f"{WAREHOUSE_PATH}/models"
+# 残しておく学習済みモデルの数（古いものから削除する）
+KEEP_MODELS = 3
+N_LAGS = 3
+
+# 天気を数値化（advanced_visualization.py のヒートマップと同じコード体系）
+WEATHER_CODES = {"晴": 1, "曇": 2, "雨": 3, "雪": 4, "霧": 5}
+CODE_LABELS = {0: "不明", **{code: label for label, code in WEATHER_CODES.items()}}
+
+FEATURE_COLUMNS = [f"lag_{k}" for k in range(N_LAGS)] + ["forecast_tomorrow", "doy_sin", "doy_cos"]
+
+
+def _telop_code(column: str) -> pl.Expr:
+    """telop 文字列の先頭に現れる天気記号をコード化する（該当なしは 0）"""
+    return (
+        pl.col(column)
+        .cast(pl.Utf8)
+        .str.extract(r"([晴曇雨雪霧])")
+        .replace_strict(WEATHER_CODES, default=0, return_dtype=pl.Int8)
+    )
+
+
+def build_feature_frame(df: pl.DataFrame) -> pl.DataFrame:
+    """都市ごとのラグ付き天気コードと通日から特徴量フレームを作成する
+
+    lag_k 列は k 日前、target 列は翌日の同じ都市の天気コード。
+    該当する日のデータが無い場合は null になる（コード 0 の「不明」とは区別する）。
+    日付が YYYYMMDD として解釈できない行は除く。
+    同じ都市・日付の行が複数ある場合は、そのうち任意の1行を使う。
+    """
+    df = (
+        df.select(["city", "date", "today", "tomorrow"])
+        .with_columns(pl.col("date").cast(pl.Utf8).str.strptime(pl.Date, "%Y%m%d", strict=False))
+        .drop_nulls("date")
+        # 同じ日に複数回取得した場合は1件のみ使う（取得時刻の列が無いため、どの1件かは不定）
+        .unique(subset=["city", "date"], keep="any")
+        .with_columns(
+            _telop_code("today").alias("today_code"),
+            _telop_code("tomorrow").alias("forecast_tomorrow"),
+            pl.col("date").dt.ordinal_day().alias("doy"),
+        )
+    )
+
+    # 行ではなく日付でずらすため、k 日後の日付に付け替えたコードを結合する
+    codes = df.select("city", "date", "today_code")
+    for k in range(N_LAGS):
+        df = df.join(
+            codes.select("city", pl.col("date") + pl.duration(days=k), pl.col("today_code").alias(f"lag_{k}")),
+            on=["city", "date"],
+            how="left",
+        )
+    df = df.join(
+        codes.select("city", pl.col("date") - pl.duration(days=1), pl.col("today_code").alias("target")),
+        on=["city", "date"],
+        how="left",
+    )
+
+    return df.with_columns(
+        (2 * np.pi * pl.col("doy") / 366).sin().alias("doy_sin"),
+        (2 * np.pi * pl.col("doy") / 366).cos().alias("doy_cos"),
+    ).sort(["city", "date"])
+
+
+def _feature_matrix(frame: pl.DataFrame) -> np.ndarray:
+    # 欠けているラグは NaN として渡す（RandomForestClassifier は欠損値を扱える）
+    return frame.select(pl.col(FEATURE_COLUMNS).cast(pl.Float32)).to_numpy()
+
+
+def build_training_set(df: pl.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """学習用の特徴量行列とラベルを NumPy 配列としてまとめて返す"""
+    frame = build_feature_frame(df).drop_nulls("target")
+    X = _feature_matrix(frame)
+    y = frame["target"].to_numpy().astype(np.int64)
+    return X, y
+
+
+def train_model(X: np.ndarray, y: np.ndarray) -> RandomForestClassifier:
+    """翌日の天気分類器を CPU の全コアを使って学習する"""
+    model = RandomForestClassifier(n_estimators=200, n_jobs=-1, random_state=0)
+    model.fit(X, y)
+    return model
+
+
+def _snapshot_id(table) -> int:
+    snapshot = table.current_snapshot()
+    return snapshot.snapshot_id if snapshot is not None else 0
+
+
+def _model_path(snapshot_id: int) -> str:
+    return os.path.join(MODEL_DIR, f"forecast_{snapshot_id}.pkl")
+
+
+def _saved_models() -> list[str]:
+    """保存済みモデルのパスを新しい順に返す"""
+    models = []
+    for path in glob.glob(os.path.join(MODEL_DIR, "forecast_*.pkl")):
+        # 一覧を取った後に他のプロセスが削除した場合は飛ばす
+        with contextlib.suppress(FileNotFoundError):
+            models.append((os.path.getmtime(path), path))
+    return [path for _, path in sorted(models, reverse=True)]
+
+
+def _save_model(model: RandomForestClassifier, model_path: str):
+    # 同じスナップショットを同時に学習しても壊れないよう、一意な一時ファイル経由で保存する
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=MODEL_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(model, f)
+        os.replace(tmp_path, model_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    for old_path in _saved_models()[KEEP_MODELS:]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(old_path)
+
+
+def load_or_train(table) -> RandomForestClassifier | None:
+    """テーブルのスナップショットに対応する学習済みモデルを返す
+
+    キャッシュが無い場合のみ学習し、data/models 以下に保存する。
+    学習データが無い場合は None を返す。
+    """
+    snapshot_id = _snapshot_id(table)
+    model_path = _model_path(snapshot_id)
+
+    # 他のプロセスが削除していた場合は学習し直す
+    with contextlib.suppress(FileNotFoundError):
+        return load_model(model_path)
+
+    df = pl.scan_iceberg(table).collect()
+    X, y = build_training_set(df)
+    if len(y) == 0:
+        return None
+
+    model = train_model(X, y)
+    _save_model(model, model_path)
+    print(f"モデルを学習しました (snapshot: {snapshot_id}, サンプル数: {len(y)})")
+    return model
+
+
+def latest_model_path() -> str | None:
+    """最も新しく保存されたモデルのパスを返す（無ければ None）"""
+    models = _saved_models()
+    return models[0] if models else None
+
+
+def load_model(model_path: str) -> RandomForestClassifier:
+    """保存済みモデルを読み込む（学習は行わない）"""
+    with open(model_path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_latest_model() -> RandomForestClassifier | None:
+    """最も新しい保存済みモデルを読み込む（学習は行わない、無ければ None）"""
+    for model_path in _saved_models():
+        with contextlib.suppress(FileNotFoundError):
+            return load_model(model_path)
+    return None
+
+
+def predict_next_day(model: RandomForestClassifier, df: pl.DataFrame) -> pl.DataFrame:
+    """都市ごとの最新データ (base_date) から翌日 (target_date) の天気を予測する"""
+    latest = build_feature_frame(df).group_by("city", maintain_order=True).last()
+    if latest.is_empty():
+        return pl.DataFrame(schema={
+            "city": pl.Utf8,
+            "base_date": pl.Date,
+            "target_date": pl.Date,
+            "prediction": pl.Utf8,
+            "confidence": pl.Float64,
+        })
+
+    X = _feature_matrix(latest)
+    proba = model.predict_proba(X)
+    codes = model.classes_[proba.argmax(axis=1)]
+
+    return latest.select(
+        "city",
+        pl.col("date").alias("base_date"),
+        (pl.col("date") + pl.duration(days=1)).alias("target_date"),
+    ).with_columns(
+        pl.Series("prediction", [CODE_LABELS.get(int(code), "不明") for code in codes]),
+        pl.Series("confidence", proba.max(axis=1)),
+    )
+
+
+if __name__ == "__main__":
+    table = get_table()
+    model = load_or_train(table)
+    if model is None:
+        print("学習データが不足しています。数日分のデータを取得してから再実行してください。")
+    else:
+        print(predict_next_day(model, pl.scan_iceberg(table).collect()))
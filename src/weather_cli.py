@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from catalog import FORECAST_SCHEMA, get_table
+from pyiceberg.expressions import AlwaysTrue, And, EqualTo, GreaterThanOrEqual, LessThanOrEqual
+
+# JSON は1行1レコードの JSONL のみ対応（配列形式の .json は読めない）
+FORMATS = {".csv": "csv", ".jsonl": "json", ".ndjson": "json", ".parquet": "parquet"}
+ISO_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+# 取り込み済みの位置を Iceberg スナップショットのサマリーに記録するためのキー
+SOURCE_PROPERTY = "import.source"
+OFFSET_PROPERTY = "import.offset"
+
+
+def _detect_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return "json" if fmt == "jsonl" else fmt
+    if os.path.isdir(path):
+        # ディレクトリの場合は中のファイルの拡張子から判別する
+        exts = {
+            os.path.splitext(name)[1].lower()
+            for _, _, names in os.walk(path)
+            for name in names
+            if not name.startswith(".")
+        }
+        formats = {FORMATS.get(ext) for ext in exts}
+        if len(formats) != 1 or None in formats:
+            raise ValueError(f"ディレクトリ内のファイル形式を判別できません: {path}（--format で指定してください）")
+        return formats.pop()
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        raise ValueError(f"JSON 配列形式には対応していません: {path}（1行1レコードの JSONL に変換してください）")
+    if ext not in FORMATS:
+        raise ValueError(f"ファイル形式を判別できません: {path}（--format で指定してください）")
+    return FORMATS[ext]
+
+
+def _normalize_date(date: pa.Array) -> pa.Array:
+    """日付列を YYYYMMDD 文字列に揃える（実在しない日付は null）"""
+    # 日付型や "2025-01-01" 形式で読み込まれた場合も "20250101" にする
+    if pa.types.is_date(date.type):
+        date = date.cast(pa.timestamp("s"))
+    if pa.types.is_timestamp(date.type):
+        date = pc.strftime(date, format="%Y%m%d")
+    date = date.cast(pa.large_string())
+    date = pc.if_else(
+        pc.fill_null(pc.match_substring_regex(date, ISO_DATE_PATTERN), False),
+        pc.replace_substring(date, "-", ""),
+        date,
+    )
+
+    # strptime は 20230229 を 3/1 に繰り上げるなど寛容なため、書式を戻して一致するものだけ残す
+    parsed = pc.strptime(date, format="%Y%m%d", unit="s", error_is_null=True)
+    valid = pc.fill_null(pc.equal(pc.strftime(parsed, format="%Y%m%d"), date), False)
+    return pc.if_else(valid, date, pa.scalar(None, pa.large_string()))
+
+
+def _normalize_batch(batch: pa.RecordBatch) -> tuple[pa.RecordBatch, int]:
+    """テーブルの型に揃え、日付が不正な行を除いたバッチと除外件数を返す"""
+    columns = [
+        _normalize_date(batch.column(name)) if name == "date" else batch.column(name).cast(pa.large_string())
+        for name in FORECAST_SCHEMA.names
+    ]
+    normalized = pa.RecordBatch.from_arrays(columns, schema=FORECAST_SCHEMA)
+    filtered = normalized.filter(pc.is_valid(normalized.column("date")))
+    return filtered, normalized.num_rows - filtered.num_rows
+
+
+def _report(label: str, rows: int, started: float):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"{label}: {rows:,} 行 / {elapsed:.2f} 秒 ({rate:,.0f} rows/s)")
+
+
+def _source_key(path: str) -> str:
+    # 同じパスでも中身が差し替えられた場合は別のファイルとして扱う
+    return f"{os.path.abspath(path)}:{os.path.getsize(path)}"
+
+
+def _imported_offsets(table) -> dict[str, int]:
+    """ファイルごとに取り込み済みの行数を返す"""
+    offsets: dict[str, int] = {}
+    for snapshot in table.snapshots():
+        summary = snapshot.summary
+        if summary is None or summary.get(SOURCE_PROPERTY) is None:
+            continue
+        source = summary.get(SOURCE_PROPERTY)
+        offsets[source] = max(offsets.get(source, 0), int(summary.get(OFFSET_PROPERTY)))
+    return offsets
+
+
+def import_files(paths: list[str], fmt: str | None, chunk_rows: int, batch_rows: int):
+    """CSV/JSONL/Parquet ファイルを一定行数ずつ weather.forecast に追記する
+
+    ファイルはレコードバッチ単位で読み込み、chunk_rows 行たまるごと
+    （またはファイルの終わりごと）に1回コミットするため、メモリ使用量は
+    チャンクサイズで頭打ちになる。各コミットにはファイルと読み終えた行数を
+    記録するので、途中で失敗しても再実行すれば続きから取り込む。
+    """
+    table = get_table(create=True)
+    imported = _imported_offsets(table)
+
+    started = time.perf_counter()
+    total = 0
+    pending: list[pa.RecordBatch] = []
+    pending_rows = 0
+
+    def flush(source: str, offset: int):
+        nonlocal total, pending, pending_rows
+        if not pending:
+            return
+        table.append(
+            pa.Table.from_batches(pending, schema=FORECAST_SCHEMA),
+            snapshot_properties={SOURCE_PROPERTY: source, OFFSET_PROPERTY: str(offset)},
+        )
+        total += pending_rows
+        pending, pending_rows = [], 0
+        _report("インポート中", total, started)
+
+    rejected = 0
+    skipped = 0
+    for path in paths:
+        path_format = _detect_format(path, fmt)
+        for file in ds.dataset(path, format=path_format).files:
+            source = _source_key(file)
+            done = imported.get(source, 0)
+            read = 0
+            batches = ds.dataset(file, format=path_format).to_batches(columns=FORECAST_SCHEMA.names, batch_size=batch_rows)
+            for batch in batches:
+                start, read = read, read + batch.num_rows
+                # 前回までに取り込み済みの行は読み飛ばす
+                if read <= done:
+                    skipped += batch.num_rows
+                    continue
+                if start < done:
+                    skipped += done - start
+                    batch = batch.slice(done - start)
+
+                batch, invalid = _normalize_batch(batch)
+                rejected += invalid
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                if pending_rows >= chunk_rows:
+                    flush(source, read)
+            flush(source, read)
+
+    _report("インポート完了", total, started)
+    if skipped:
+        print(f"取り込み済みの {skipped:,} 行をスキップしました。")
+    if rejected:
+        print(f"日付が不正な {rejected:,} 行をスキップしました。")
+
+
+def _row_filter(city: str | None, since: str | None, until: str | None):
+    expr = AlwaysTrue()
+    if city:
+        expr = And(expr, EqualTo("city", city))
+    if since:
+        expr = And(expr, GreaterThanOrEqual("date", since))
+    if until:
+        expr = And(expr, LessThanOrEqual("date", until))
+    return expr
+
+
+def export_table(path: str, fmt: str | None, city: str | None, since: str | None, until: str | None):
+    """weather.forecast の指定範囲をレコードバッチ単位でファイルに書き出す"""
+    fmt = _detect_format(path, fmt)
+    table = get_table()
+    reader = table.scan(row_filter=_row_filter(city, since, until)).to_arrow_batch_reader()
+
+    started = time.perf_counter()
+    total = 0
+
+    if fmt == "parquet":
+        with pq.ParquetWriter(path, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                total += batch.num_rows
+    elif fmt == "csv":
+        with pa_csv.CSVWriter(path, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                total += batch.num_rows
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            for batch in reader:
+                f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in batch.to_pylist())
+                total += batch.num_rows
+
+    _report("エクスポート完了", total, started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="weather.forecast の一括インポート/エクスポート")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="過去の予報データを一括で取り込む")
+    import_parser.add_argument("paths", nargs="+", help="CSV/JSONL/Parquet ファイルまたはディレクトリ（ディレクトリ内は同じ形式のファイルのみ）")
+    import_parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], help="入力形式（省略時は拡張子から判別）")
+    import_parser.add_argument("--chunk-rows", type=int, default=100_000, help="1回のコミットで書き込む行数")
+    import_parser.add_argument("--batch-rows", type=int, default=10_000, help="1回に読み込む行数")
+
+    export_parser = subparsers.add_parser("export", help="テーブルの内容をファイルに書き出す")
+    export_parser.add_argument("path", help="出力ファイル")
+    export_parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], help="出力形式（省略時は拡張子から判別）")
+    export_parser.add_argument("--city", help="都市名で絞り込む")
+    export_parser.add_argument("--since", help="開始日 (YYYYMMDD)")
+    export_parser.add_argument("--until", help="終了日 (YYYYMMDD)")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        import_files(args.paths, args.format, args.chunk_rows, args.batch_rows)
+    else:
+        export_table(args.path, args.format, args.city, args.since, args.until)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("pyiceberg")
+
+import catalog
+import spool
+from pyiceberg.table import Table
+
+
+def _record(i: int) -> dict:
+    return {"city": "東京都 東京", "date": f"2025{i // 28 + 1:02d}{i % 28 + 1:02d}", "today": "晴れ", "tomorrow": "曇り"}
+
+
+def _committed_rows() -> list[dict]:
+    return catalog.get_table().scan().to_arrow().sort_by("date").to_pylist()
+
+
+@pytest.fixture(autouse=True)
+def warehouse(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "WAREHOUSE_PATH", str(tmp_path))
+    monkeypatch.setattr(spool, "SPOOL_DIR", str(tmp_path / "spool"))
+    return tmp_path
+
+
+def test_drain_commits_spooled_rows_once():
+    spool.append([_record(0), _record(1)])
+    spool.append([_record(2)])
+
+    assert spool.drain() == 3
+    assert spool.drain() == 0
+    assert _committed_rows() == [_record(0), _record(1), _record(2)]
+
+
+def test_drain_commits_in_batches():
+    spool.append([_record(i) for i in range(5)])
+
+    assert spool.drain(batch_rows=2) == 5
+    assert len(catalog.get_table().snapshots()) == 3
+
+
+def test_failed_commit_is_replayed(monkeypatch):
+    spool.append([_record(0)])
+
+    def failing_append(self, *args, **kwargs):
+        raise RuntimeError("commit failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(Table, "append", failing_append)
+        with pytest.raises(RuntimeError):
+            spool.drain()
+
+    assert spool.drain() == 1
+    assert _committed_rows() == [_record(0)]
+
+
+def test_crash_between_commit_and_checkpoint_does_not_duplicate(monkeypatch):
+    spool.append([_record(0), _record(1)])
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crashed")
+
+    with monkeypatch.context() as m:
+        m.setattr(spool, "_write_checkpoint", crash)
+        with pytest.raises(RuntimeError):
+            spool.drain()
+
+    assert spool.drain() == 0
+    assert _committed_rows() == [_record(0), _record(1)]
+
+
+def test_torn_last_line_is_skipped():
+    spool.append([_record(0)])
+    with open(spool._segment_path(spool._list_segments()[-1]), "ab") as f:
+        f.write('{"city": "東京'.encode("utf-8"))
+    spool.append([_record(1)])
+
+    assert spool._list_segments() == [0, 1]
+    assert spool.drain() == 2
+    assert _committed_rows() == [_record(0), _record(1)]
+
+
+def test_short_writes_are_completed(monkeypatch):
+    original_write = os.write
+    with monkeypatch.context() as m:
+        m.setattr(spool.os, "write", lambda fd, data: original_write(fd, bytes(data[:7])))
+        spool.append([_record(0), _record(1)])
+
+    assert spool._list_segments() == [0]
+    assert spool.drain() == 2
+    assert _committed_rows() == [_record(0), _record(1)]
+
+
+def test_segments_rotate_and_committed_ones_are_removed(monkeypatch):
+    monkeypatch.setattr(spool, "SEGMENT_MAX_BYTES", 200)
+    for i in range(10):
+        spool.append([_record(i)])
+
+    segments = spool._list_segments()
+    assert len(segments) > 1
+
+    assert spool.drain() == 10
+    assert spool._list_segments() == segments[-1:]
+    assert _committed_rows() == [_record(i) for i in range(10)]
+
+
+def test_recreated_spool_is_not_skipped():
+    for i in range(3):
+        spool.append([_record(i)])
+        spool.drain()
+    shutil.rmtree(spool.SPOOL_DIR)
+
+    spool.append([_record(3)])
+
+    assert spool.drain() == 1
+    assert _committed_rows() == [_record(i) for i in range(4)]
+
+
+def test_checkpoint_records_spool_id():
+    spool.append([_record(0)])
+    spool.drain()
+
+    with open(os.path.join(spool.SPOOL_DIR, spool.CHECKPOINT_FILE)) as f:
+        checkpoint = json.load(f)
+    summary = catalog.get_table().current_snapshot().summary
+
+    assert checkpoint["spool_id"] == summary[spool.SPOOL_ID_PROPERTY]
+    assert (checkpoint["segment"], checkpoint["offset"]) == (0, 1)
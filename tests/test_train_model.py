@@ -0,0 +1,122 @@
+import datetime
+import os
+import pickle
+import pytest
+
+pytest.importorskip("polars")
+pytest.importorskip("sklearn")
+pytest.importorskip("pyiceberg")
+
+import numpy as np
+import polars as pl
+import train_model
+
+
+def _forecasts(rows: list[tuple[str, str, str]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        [{"city": city, "date": date, "today": today, "tomorrow": "曇り"} for city, date, today in rows]
+    )
+
+
+@pytest.fixture(autouse=True)
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_model, "MODEL_DIR", str(tmp_path / "models"))
+    return tmp_path / "models"
+
+
+def test_lags_and_target_follow_calendar_days():
+    df = _forecasts([
+        ("A", "20240101", "晴れ"),
+        ("A", "20240102", "雨"),
+        ("A", "20240104", "雪"),
+        ("A", "20240105", "曇り"),
+    ])
+    frame = train_model.build_feature_frame(df)
+    rows = {row["date"]: row for row in frame.to_dicts()}
+
+    assert frame["date"].to_list() == sorted(rows)
+    day4 = rows[datetime.date(2024, 1, 4)]
+    assert (day4["lag_0"], day4["lag_1"], day4["lag_2"]) == (4, None, 3)
+    assert rows[datetime.date(2024, 1, 1)]["target"] == 3
+    assert rows[datetime.date(2024, 1, 2)]["target"] is None
+    assert rows[datetime.date(2024, 1, 4)]["target"] == 2
+    assert rows[datetime.date(2024, 1, 5)]["target"] is None
+
+
+def test_lags_do_not_cross_cities():
+    df = _forecasts([("A", "20240101", "晴れ"), ("B", "20240102", "雨")])
+    rows = train_model.build_feature_frame(df).to_dicts()
+
+    assert [row["lag_1"] for row in rows] == [None, None]
+    assert [row["target"] for row in rows] == [None, None]
+
+
+def test_invalid_dates_are_dropped():
+    df = _forecasts([
+        ("A", "20240101", "晴れ"),
+        ("A", "20251399", "雨"),
+        ("A", "abc", "雨"),
+        ("A", "20240102", "雨"),
+    ])
+    X, y = train_model.build_training_set(df)
+
+    assert X.shape == (1, len(train_model.FEATURE_COLUMNS))
+    assert y.tolist() == [3]
+
+
+def test_unknown_telop_is_distinct_from_missing_lag():
+    df = _forecasts([("A", "20240101", "不明な天気"), ("A", "20240102", "晴れ")])
+    X, y = train_model.build_training_set(df)
+
+    lag_0, lag_1 = X[0, 0], X[0, 1]
+    assert lag_0 == 0
+    assert np.isnan(lag_1)
+    assert y.tolist() == [1]
+
+
+def test_predict_next_day_reports_base_and_target_dates():
+    rows = [("A", f"202401{day:02d}", ["晴れ", "曇り", "雨"][day % 3]) for day in range(1, 15)]
+    df = _forecasts(rows + [("B", "20240110", "晴れ")])
+    model = train_model.train_model(*train_model.build_training_set(df))
+
+    predictions = train_model.predict_next_day(model, df)
+
+    assert predictions["city"].to_list() == ["A", "B"]
+    assert predictions["base_date"].to_list() == [datetime.date(2024, 1, 14), datetime.date(2024, 1, 10)]
+    assert predictions["target_date"].to_list() == [datetime.date(2024, 1, 15), datetime.date(2024, 1, 11)]
+    assert set(predictions["prediction"].to_list()) <= set(train_model.CODE_LABELS.values())
+
+
+def test_saved_models_are_pruned(model_dir):
+    model = train_model.train_model(np.zeros((2, len(train_model.FEATURE_COLUMNS)), dtype=np.float32), np.array([1, 2]))
+    for snapshot_id in range(train_model.KEEP_MODELS + 2):
+        path = train_model._model_path(snapshot_id)
+        train_model._save_model(model, path)
+        os.utime(path, (snapshot_id, snapshot_id))
+
+    assert train_model._saved_models() == [
+        train_model._model_path(snapshot_id)
+        for snapshot_id in reversed(range(2, train_model.KEEP_MODELS + 2))
+    ]
+    assert not [name for name in os.listdir(model_dir) if name.endswith(".tmp")]
+
+
+def test_load_latest_model_skips_removed_files(model_dir, monkeypatch):
+    model_dir.mkdir()
+    path = train_model._model_path(1)
+    with open(path, "wb") as f:
+        pickle.dump("model", f)
+    monkeypatch.setattr(train_model, "_saved_models", lambda: [train_model._model_path(2), path])
+
+    assert train_model.load_latest_model() == "model"
+
+
+def test_saved_models_ignores_files_removed_during_listing(model_dir, monkeypatch):
+    model_dir.mkdir()
+    path = train_model._model_path(1)
+    with open(path, "wb") as f:
+        pickle.dump("model", f)
+    vanished = train_model._model_path(2)
+    monkeypatch.setattr(train_model.glob, "glob", lambda pattern: [vanished, path])
+
+    assert train_model._saved_models() == [path]
@@ -0,0 +1,184 @@
+import datetime
+import json
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("pyiceberg")
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import catalog
+import weather_cli
+from pyiceberg.table import Table
+
+COLUMNS = ["city", "date", "today", "tomorrow"]
+
+
+def _rows(city: str, dates: list[str]) -> list[dict]:
+    return [{"city": city, "date": date, "today": "晴れ", "tomorrow": "曇り"} for date in dates]
+
+
+def _write_csv(path, rows: list[dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        f.writelines(",".join(row[name] for name in COLUMNS) + "\n" for row in rows)
+
+
+def _write_jsonl(path, rows: list[dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+def _committed_dates() -> list[str]:
+    return sorted(catalog.get_table().scan().to_arrow().column("date").to_pylist())
+
+
+@pytest.fixture(autouse=True)
+def warehouse(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "WAREHOUSE_PATH", str(tmp_path / "warehouse"))
+    (tmp_path / "warehouse").mkdir()
+    return tmp_path
+
+
+def test_detect_format(tmp_path):
+    assert weather_cli._detect_format("a.csv", None) == "csv"
+    assert weather_cli._detect_format("a.JSONL", None) == "json"
+    assert weather_cli._detect_format("a.parquet", None) == "parquet"
+    assert weather_cli._detect_format("a.txt", "jsonl") == "json"
+    with pytest.raises(ValueError, match="JSONL"):
+        weather_cli._detect_format("a.json", None)
+    with pytest.raises(ValueError):
+        weather_cli._detect_format("a.txt", None)
+
+
+def test_detect_format_from_directory(tmp_path):
+    directory = tmp_path / "in"
+    directory.mkdir()
+    _write_csv(directory / "a.csv", _rows("A", ["20250101"]))
+    _write_csv(directory / "b.csv", _rows("A", ["20250102"]))
+    assert weather_cli._detect_format(str(directory), None) == "csv"
+
+    _write_jsonl(directory / "c.jsonl", _rows("A", ["20250103"]))
+    with pytest.raises(ValueError, match="--format"):
+        weather_cli._detect_format(str(directory), None)
+
+
+def test_normalize_batch_formats_dates():
+    batch = pa.RecordBatch.from_pydict({
+        "city": ["A"] * 4,
+        "date": ["20250101", "2025-01-02", "20240229", "20250104"],
+        "today": ["晴れ"] * 4,
+        "tomorrow": ["曇り"] * 4,
+    })
+    normalized, rejected = weather_cli._normalize_batch(batch)
+
+    assert rejected == 0
+    assert normalized.schema == catalog.FORECAST_SCHEMA
+    assert normalized.column("date").to_pylist() == ["20250101", "20250102", "20240229", "20250104"]
+
+
+@pytest.mark.parametrize("date", [
+    pa.array([datetime.date(2025, 1, 1)]),
+    pa.array([datetime.datetime(2025, 1, 1, 9)]),
+    pa.array([20250101]),
+])
+def test_normalize_batch_converts_date_types(date):
+    batch = pa.RecordBatch.from_arrays([pa.array(["A"]), date, pa.array(["晴れ"]), pa.array(["曇り"])], names=COLUMNS)
+    normalized, rejected = weather_cli._normalize_batch(batch)
+
+    assert rejected == 0
+    assert normalized.column("date").to_pylist() == ["20250101"]
+
+
+def test_normalize_batch_rejects_invalid_dates():
+    dates = ["20251399", "20230229", "2025111", "2025-13-01", "abc", None, "20250101"]
+    batch = pa.RecordBatch.from_pydict({
+        "city": ["A"] * len(dates),
+        "date": dates,
+        "today": ["晴れ"] * len(dates),
+        "tomorrow": ["曇り"] * len(dates),
+    })
+    normalized, rejected = weather_cli._normalize_batch(batch)
+
+    assert rejected == len(dates) - 1
+    assert normalized.column("date").to_pylist() == ["20250101"]
+
+
+@pytest.mark.parametrize("ext", ["csv", "jsonl", "parquet"])
+def test_import_normalizes_iso_dates(tmp_path, ext):
+    path = tmp_path / f"history.{ext}"
+    rows = _rows("A", ["2025-01-01", "2025-01-02", "2025-02-30"])
+    if ext == "csv":
+        _write_csv(path, rows)
+    elif ext == "jsonl":
+        _write_jsonl(path, rows)
+    else:
+        table = pa.Table.from_pylist(rows)
+        table = table.set_column(1, "date", pa.array([datetime.date(2025, 1, 1), datetime.date(2025, 1, 2), None]))
+        pq.write_table(table, path)
+
+    weather_cli.import_files([str(path)], None, chunk_rows=100, batch_rows=100)
+
+    assert _committed_dates() == ["20250101", "20250102"]
+
+
+def test_import_directory(tmp_path):
+    directory = tmp_path / "in"
+    directory.mkdir()
+    _write_jsonl(directory / "a.jsonl", _rows("A", ["20250101"]))
+    _write_jsonl(directory / "b.jsonl", _rows("B", ["20250102"]))
+
+    weather_cli.import_files([str(directory)], None, chunk_rows=100, batch_rows=100)
+
+    assert _committed_dates() == ["20250101", "20250102"]
+
+
+def test_import_resumes_after_failed_commit(tmp_path, monkeypatch):
+    path = tmp_path / "history.jsonl"
+    dates = [f"202501{day:02d}" for day in range(1, 6)]
+    _write_jsonl(path, _rows("A", dates))
+
+    original_append = Table.append
+    calls = []
+
+    def failing_append(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("commit failed")
+        return original_append(self, *args, **kwargs)
+
+    with monkeypatch.context() as m:
+        m.setattr(Table, "append", failing_append)
+        with pytest.raises(RuntimeError):
+            weather_cli.import_files([str(path)], None, chunk_rows=2, batch_rows=1)
+    assert _committed_dates() == dates[:2]
+
+    weather_cli.import_files([str(path)], None, chunk_rows=2, batch_rows=1)
+    assert _committed_dates() == dates
+
+    # 取り込み済みのファイルを再実行しても重複しない
+    weather_cli.import_files([str(path)], None, chunk_rows=2, batch_rows=1)
+    assert _committed_dates() == dates
+
+
+@pytest.mark.parametrize("ext", ["csv", "jsonl", "parquet"])
+def test_export_round_trip(tmp_path, ext):
+    source = tmp_path / "history.jsonl"
+    rows = _rows("A", ["20250101", "20250102", "20250103"]) + _rows("B", ["20250102"])
+    _write_jsonl(source, rows)
+    weather_cli.import_files([str(source)], None, chunk_rows=100, batch_rows=100)
+
+    output = tmp_path / f"out.{ext}"
+    weather_cli.export_table(str(output), None, "A", "20250102", "20250103")
+
+    if ext == "csv":
+        types = {name: pa.string() for name in COLUMNS}
+        exported = pa_csv.read_csv(output, convert_options=pa_csv.ConvertOptions(column_types=types)).to_pylist()
+    elif ext == "jsonl":
+        with open(output, encoding="utf-8") as f:
+            exported = [json.loads(line) for line in f]
+    else:
+        exported = pq.read_table(output).to_pylist()
+
+    assert sorted(exported, key=lambda row: row["date"]) == rows[1:3]